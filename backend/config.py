@@ -1,6 +1,7 @@
 """Application configuration and model definitions."""
 
 import json
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -9,6 +10,10 @@ from backend.utils.storage import atomic_write_json, read_json
 IMAGEGEN_DIR = Path.home() / ".imagegen"
 CONFIG_PATH = IMAGEGEN_DIR / "config.json"
 
+# In-process copy of config.json: loaded once, then kept in sync by save_config
+_config: dict[str, Any] | None = None
+_config_lock = threading.Lock()
+
 MODELS: dict[str, dict[str, Any]] = {
     "black-forest-labs/flux.2-max": {
         "id": "black-forest-labs/flux.2-max",
@@ -76,22 +81,38 @@ def is_conversational(model_id: str) -> bool:
     return model["type"] == "conversational"
 
 
+def _cached_config() -> dict[str, Any]:
+    """Return the cached config dict, loading it from disk on first use.
+
+    Callers must not mutate the returned dict.
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                data = read_json(CONFIG_PATH)
+                _config = data if isinstance(data, dict) else {}
+    return _config
+
+
 def get_config() -> dict[str, Any]:
-    """Read the application config file."""
-    return read_json(CONFIG_PATH)
+    """Return a copy of the application config."""
+    return dict(_cached_config())
 
 
 def save_config(config: dict[str, Any]) -> None:
     """Write the application config file atomically with restricted permissions."""
-    CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-    atomic_write_json(CONFIG_PATH, config)
-    CONFIG_PATH.chmod(0o600)
+    global _config
+    with _config_lock:
+        CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(CONFIG_PATH, config)
+        CONFIG_PATH.chmod(0o600)
+        _config = dict(config)
 
 
 def get_api_key() -> str | None:
     """Get the OpenRouter API key from config, or None if not set."""
-    config = get_config()
-    return config.get("api_key")
+    return _cached_config().get("api_key")
 
 
 def set_api_key(key: str) -> None:
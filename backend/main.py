@@ -1,5 +1,6 @@
 """FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -9,14 +10,21 @@ from fastapi.staticfiles import StaticFiles
 
 from backend.routers import conversation, generate, history, projects, settings, storage, templates
 from backend.services import openrouter as openrouter_service
+from backend.services.conversation import flush_session_indexes, flush_session_writes
+from backend.utils.connectivity import close_connectivity_client
+from backend.utils.storage import purge_trash
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage shared resources across the application lifetime."""
     openrouter_service.startup()
+    await asyncio.to_thread(purge_trash)
     yield
+    flush_session_writes()
+    flush_session_indexes()
     await openrouter_service.shutdown()
+    await close_connectivity_client()
 
 
 app = FastAPI(title="Punchy Image API", lifespan=lifespan)
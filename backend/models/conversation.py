@@ -1,6 +1,6 @@
 """Pydantic schemas for multi-turn conversational editing sessions."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 from typing import Any
 
 
@@ -22,6 +22,10 @@ class ConversationBranch(BaseModel):
     parent_branch_id: str | None = None
     fork_turn_index: int | None = None  # Turn index in parent where this branched
     turns: list[ConversationTurn] = []
+    # Per-turn len(prompt) + len(text_response), parallel to turns, and its
+    # running sum; both None until first computed
+    _char_counts: list[int] | None = PrivateAttr(default=None)
+    _total_chars: int | None = PrivateAttr(default=None)
 
 
 class ConversationSession(BaseModel):
@@ -34,6 +38,12 @@ class ConversationSession(BaseModel):
     active_branch_id: str = "main"
     subject_locked: bool = False
     subject_lock_image_id: str | None = None
+    # Persistence bookkeeping (not serialized): last event sequence number
+    # written, and events appended to the log since the last snapshot
+    _log_seq: int = PrivateAttr(default=0)
+    _log_events: int = PrivateAttr(default=0)
+    # branch_id -> branch lookup; built on first use, kept in sync on fork
+    _branch_index: dict[str, ConversationBranch] | None = PrivateAttr(default=None)
 
 
 class ConversationSessionSummary(BaseModel):
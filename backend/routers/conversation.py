@@ -3,7 +3,7 @@
 import asyncio
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from backend.config import MODELS, get_api_key, is_conversational
 from backend.models.conversation import (
@@ -26,6 +26,7 @@ from backend.services.conversation import (
     create_session,
     delete_session,
     estimate_token_usage,
+    flush_session_writes,
     get_active_branch,
     list_sessions,
     load_session,
@@ -41,9 +42,8 @@ from backend.services.image_processor import (
 )
 from backend.services.mask_processor import (
     build_mask_prompt,
-    composite_mask_on_image,
+    composite_mask_as_data_url,
     decode_mask,
-    image_to_base64_data_url,
 )
 from backend.services.openrouter import OpenRouterError, generate_image
 from backend.services.prompt_builder import build_image_weight_instruction, build_prompt
@@ -56,7 +56,16 @@ from backend.utils.storage import (
     read_json,
 )
 
-router = APIRouter(tags=["conversation"])
+
+async def _flush_session_writes_after_request():
+    """Write any session events buffered during the request before it completes."""
+    try:
+        yield
+    finally:
+        flush_session_writes()
+
+
+router = APIRouter(tags=["conversation"], dependencies=[Depends(_flush_session_writes_after_request)])
 
 
 def _require_api_key() -> None:
@@ -201,8 +210,8 @@ async def conversation_edit(request: ConversationEditRequest) -> GenerateRespons
         )
 
         # Save image and thumbnail
-        image_id, image_filename, thumbnail_filename = save_generation_result(
-            result["image_data"], get_images_dir(), get_thumbnails_dir(),
+        image_id, image_filename, thumbnail_filename = await asyncio.to_thread(
+            save_generation_result, result["image_data"], get_images_dir(), get_thumbnails_dir(),
         )
         image_url, thumbnail_url = _build_image_urls(image_id)
         timestamp = datetime.now(timezone.utc).isoformat()
@@ -316,8 +325,8 @@ async def mask_edit(request: MaskEditRequest) -> GenerateResponse:
             detail={"error_type": "server", "message": "Source image not found"},
         )
 
-    # Decode mask
-    mask_image = decode_mask(request.mask.mask_image_base64)
+    # Decode mask (PNG inflate runs off the event loop)
+    mask_image = await asyncio.to_thread(decode_mask, request.mask.mask_image_base64)
 
     # Build the mask-aware prompt
     mask_prompt = build_mask_prompt(
@@ -333,8 +342,9 @@ async def mask_edit(request: MaskEditRequest) -> GenerateResponse:
         reference_image_url = image_to_base64_url(source_path.read_bytes())
     else:
         # Composite mask onto image for image-only models
-        composited_bytes = composite_mask_on_image(str(source_path), mask_image)
-        reference_image_url = image_to_base64_data_url(composited_bytes)
+        reference_image_url = await asyncio.to_thread(
+            composite_mask_as_data_url, str(source_path), mask_image,
+        )
 
     # Include conversation history if within a session
     conversation_history = None
@@ -354,8 +364,8 @@ async def mask_edit(request: MaskEditRequest) -> GenerateResponse:
             conversation_history=conversation_history,
         )
 
-        image_id, image_filename, thumbnail_filename = save_generation_result(
-            result["image_data"], get_images_dir(), get_thumbnails_dir(),
+        image_id, image_filename, thumbnail_filename = await asyncio.to_thread(
+            save_generation_result, result["image_data"], get_images_dir(), get_thumbnails_dir(),
         )
         image_url, thumbnail_url = _build_image_urls(image_id)
         timestamp = datetime.now(timezone.utc).isoformat()
@@ -457,8 +467,8 @@ async def compose_images(request: ComposeRequest) -> GenerateResponse:
             resolution=request.resolution,
         )
 
-        image_id, image_filename, thumbnail_filename = save_generation_result(
-            result["image_data"], get_images_dir(), get_thumbnails_dir(),
+        image_id, image_filename, thumbnail_filename = await asyncio.to_thread(
+            save_generation_result, result["image_data"], get_images_dir(), get_thumbnails_dir(),
         )
         timestamp = datetime.now(timezone.utc).isoformat()
 
@@ -513,7 +523,7 @@ async def enhance_image(request: EnhanceRequest) -> GenerateResponse:
 
     # Get original prompt from history
     history_path = get_project_dir() / "history.json"
-    history = read_json(history_path)
+    history = read_json(history_path, default=list)
     original_prompt = ""
     if isinstance(history, list):
         for entry in history:
@@ -542,8 +552,8 @@ async def enhance_image(request: EnhanceRequest) -> GenerateResponse:
             resolution=request.target_resolution,
         )
 
-        image_id, image_filename, thumbnail_filename = save_generation_result(
-            result["image_data"], get_images_dir(), get_thumbnails_dir(),
+        image_id, image_filename, thumbnail_filename = await asyncio.to_thread(
+            save_generation_result, result["image_data"], get_images_dir(), get_thumbnails_dir(),
         )
         timestamp = datetime.now(timezone.utc).isoformat()
 
@@ -1,6 +1,7 @@
 """Image generation, cancellation, image serving, export, reference upload, cost estimate, and model recommendation endpoints."""
 
 import asyncio
+import functools
 import re
 import uuid
 from datetime import datetime, timezone
@@ -35,7 +36,7 @@ from backend.services.openrouter import OpenRouterError, generate_image
 from backend.services.prompt_builder import STYLE_DISPLAY_NAMES, STYLE_PRESETS, build_prompt
 from backend.services.reference_store import (
     delete_reference as _delete_ref_from_store,
-    resolve_reference_urls,
+    resolve_reference_urls_async,
     store_reference,
 )
 from backend.utils.api_errors import openrouter_error_to_http, unexpected_error_to_http
@@ -67,6 +68,7 @@ def _validate_project(project: str) -> None:
         raise HTTPException(status_code=404, detail="Not found")
 
 
+@functools.lru_cache(maxsize=1)
 def _get_references_dir() -> Path:
     """Get the references directory, creating it if needed."""
     d = get_project_dir() / "references"
@@ -94,7 +96,7 @@ async def _generate_single(
     )
 
     # Resolve reference images via the reference store
-    reference_image_url, additional_image_urls = resolve_reference_urls(
+    reference_image_url, additional_image_urls = await resolve_reference_urls_async(
         reference_image_id=request.reference_image_id,
         style_reference_id=request.style_reference_id,
         character_reference_ids=request.character_reference_ids,
@@ -111,8 +113,8 @@ async def _generate_single(
     )
 
     # Save image and thumbnail
-    image_id, image_filename, thumbnail_filename = save_generation_result(
-        result["image_data"], get_images_dir(), get_thumbnails_dir(),
+    image_id, image_filename, thumbnail_filename = await asyncio.to_thread(
+        save_generation_result, result["image_data"], get_images_dir(), get_thumbnails_dir(),
     )
 
     image_url = f"/api/images/default/{image_filename}"
@@ -271,7 +273,7 @@ async def upload_reference(file: UploadFile) -> ReferenceUploadResponse:
 
     raw = await file.read()
     try:
-        processed_bytes, was_resized = validate_and_process_upload(raw)
+        processed_bytes, was_resized = await asyncio.to_thread(validate_and_process_upload, raw)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -285,7 +287,7 @@ async def upload_reference(file: UploadFile) -> ReferenceUploadResponse:
     ref_path = _get_references_dir() / f"{reference_id}.jpg"
     ref_path.write_bytes(processed_bytes)
     thumb_path = ref_thumb_dir / f"{reference_id}_thumb.png"
-    generate_thumbnail(ref_path, thumb_path)
+    await asyncio.to_thread(generate_thumbnail, ref_path, thumb_path)
 
     return ReferenceUploadResponse(
         reference_id=reference_id,
@@ -360,7 +362,9 @@ async def export_image(
     if fmt not in EXPORT_MIME_TYPES:
         fmt = "png"
 
-    clean_bytes = prepare_for_export(image_path, fmt=fmt, quality=quality, dpi=dpi)
+    clean_bytes = await asyncio.to_thread(
+        prepare_for_export, image_path, fmt=fmt, quality=quality, dpi=dpi,
+    )
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     ext = fmt if fmt != "jpeg" else "jpg"
     filename = f"imagegen_{timestamp}.{ext}"
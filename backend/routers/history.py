@@ -1,5 +1,9 @@
 """Generation history CRUD endpoints."""
 
+import asyncio
+from pathlib import Path
+from typing import Any
+
 from fastapi import APIRouter, HTTPException
 
 from backend.models.history import HistoryEntry, HistoryListResponse
@@ -8,10 +12,22 @@ from backend.utils.storage import atomic_write_json, get_project_dir, read_json
 router = APIRouter(tags=["history"])
 
 
+def _delete_entry_files(
+    project_dir: Path,
+    image_id: str,
+    history_path: Path,
+    updated: list[dict[str, Any]],
+) -> None:
+    """Remove an entry's image and thumbnail and persist the updated history."""
+    (project_dir / "images" / f"{image_id}.png").unlink(missing_ok=True)
+    (project_dir / "thumbnails" / f"{image_id}_thumb.png").unlink(missing_ok=True)
+    atomic_write_json(history_path, updated)
+
+
 @router.get("/history", response_model=HistoryListResponse)
 async def get_history() -> HistoryListResponse:
     history_path = get_project_dir() / "history.json"
-    entries = read_json(history_path)
+    entries = read_json(history_path, default=list)
     if not isinstance(entries, list):
         entries = []
     entries.sort(key=lambda e: e.get("timestamp", ""), reverse=True)
@@ -24,7 +40,7 @@ async def get_history() -> HistoryListResponse:
 @router.delete("/history/{image_id}")
 async def delete_history_entry(image_id: str) -> dict:
     history_path = get_project_dir() / "history.json"
-    entries = read_json(history_path)
+    entries = read_json(history_path, default=list)
     if not isinstance(entries, list):
         raise HTTPException(status_code=404)
 
@@ -32,10 +48,6 @@ async def delete_history_entry(image_id: str) -> dict:
     if len(updated) == len(entries):
         raise HTTPException(status_code=404, detail="Entry not found")
 
-    # Delete image and thumbnail files
-    project_dir = get_project_dir()
-    (project_dir / "images" / f"{image_id}.png").unlink(missing_ok=True)
-    (project_dir / "thumbnails" / f"{image_id}_thumb.png").unlink(missing_ok=True)
-
-    atomic_write_json(history_path, updated)
+    # Delete image and thumbnail files and save history in one worker thread hop
+    await asyncio.to_thread(_delete_entry_files, get_project_dir(), image_id, history_path, updated)
     return {"deleted": True}
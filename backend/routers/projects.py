@@ -1,18 +1,25 @@
 """Project management endpoints: CRUD, switch, export, import."""
 
+import asyncio
+import os
 import re
 import shutil
+import time
 import uuid
 import zipfile
+from collections.abc import Iterator
 from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile
 from fastapi.responses import StreamingResponse
 
 MAX_ZIP_SIZE = 500 * 1024 * 1024  # 500 MB
 MAX_ZIP_ENTRIES = 10_000
+# Already-compressed formats gain nothing from deflate; store them as-is
+STORED_SUFFIXES = frozenset({".png", ".jpg", ".jpeg", ".webp"})
+EXPORT_COPY_CHUNK = 1024 * 1024  # 1 MiB per read/write when copying into the archive
 
 from backend.config import get_config, save_config
 from backend.models.project import (
@@ -27,11 +34,14 @@ from backend.utils.storage import (
     atomic_write_json,
     get_project_dir,
     list_projects,
+    move_to_trash,
     read_json,
 )
 
 router = APIRouter(tags=["projects"])
 
+_SLUG_RE = re.compile(r"[^a-z0-9_-]")
+
 
 def _get_current_project() -> str:
     config = get_config()
@@ -56,6 +66,37 @@ def _load_project_info(project_id: str) -> ProjectInfo:
     )
 
 
+def _claim_project_dir(project_id: str) -> tuple[str, Path]:
+    """Atomically create a new project directory, suffixing the id on collision.
+
+    Returns (project_id, project_dir) for the directory that was created.
+    """
+    candidate = project_id
+    while True:
+        project_dir = get_project_dir(candidate)
+        try:
+            project_dir.mkdir(parents=True)
+            return candidate, project_dir
+        except FileExistsError:
+            candidate = f"{project_id}-{uuid.uuid4().hex[:6]}"
+
+
+def _iter_export_files(root: Path) -> Iterator[tuple[str, str, os.stat_result]]:
+    """Yield (path, arcname, stat) for every regular file under root.
+
+    Symlinks are skipped and never followed, so nothing outside root is reached.
+    """
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    arcname = os.path.relpath(entry.path, root)
+                    yield entry.path, arcname, entry.stat(follow_symlinks=False)
+
+
 def _ensure_project_dirs(project_dir: Path) -> None:
     for sub in ["images", "thumbnails", "references", "conversations"]:
         (project_dir / sub).mkdir(parents=True, exist_ok=True)
@@ -79,15 +120,10 @@ async def create_project(request: CreateProjectRequest) -> ProjectInfo:
     if not name:
         raise HTTPException(status_code=400, detail="Project name cannot be empty")
 
-    project_id = re.sub(r"[^a-z0-9_-]", "", name.lower().replace(" ", "-"))
+    project_id = _SLUG_RE.sub("", name.lower().replace(" ", "-"))
     if not project_id:
         raise HTTPException(status_code=400, detail="Project name must contain at least one alphanumeric character")
-    # Ensure unique
-    existing = list_projects()
-    if project_id in existing:
-        project_id = f"{project_id}-{uuid.uuid4().hex[:6]}"
-
-    project_dir = get_project_dir(project_id)
+    project_id, project_dir = _claim_project_dir(project_id)
     _ensure_project_dirs(project_dir)
 
     now = datetime.now(timezone.utc).isoformat()
@@ -120,11 +156,16 @@ async def rename_project(project_id: str, request: RenameProjectRequest) -> Proj
     meta["updated_at"] = datetime.now(timezone.utc).isoformat()
     atomic_write_json(meta_path, meta)
 
-    return _load_project_info(project_id)
+    return ProjectInfo(
+        id=project_id,
+        name=meta["name"],
+        created_at=meta.get("created_at", ""),
+        updated_at=meta["updated_at"],
+    )
 
 
 @router.delete("/projects/{project_id}")
-async def delete_project(project_id: str) -> dict:
+async def delete_project(project_id: str, background_tasks: BackgroundTasks) -> dict:
     if project_id == "default":
         raise HTTPException(status_code=400, detail="Cannot delete the default project")
 
@@ -132,7 +173,9 @@ async def delete_project(project_id: str) -> dict:
     if not project_dir.exists():
         raise HTTPException(status_code=404, detail="Project not found")
 
-    shutil.rmtree(project_dir)
+    # Rename out of the way now; the recursive delete runs after the response is sent
+    trash_path = move_to_trash(project_dir)
+    background_tasks.add_task(shutil.rmtree, trash_path, ignore_errors=True)
 
     # Switch to default if this was the active project
     if _get_current_project() == project_id:
@@ -180,17 +223,21 @@ async def export_project(project_id: str) -> StreamingResponse:
         raise HTTPException(status_code=404, detail="Project not found")
 
     buf = BytesIO()
-    resolved_root = project_dir.resolve()
     with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file_path in project_dir.rglob("*"):
-            if file_path.is_symlink():
-                continue
-            if not file_path.is_file():
-                continue
-            if not str(file_path.resolve()).startswith(str(resolved_root)):
+        for file_path, arcname, st in _iter_export_files(project_dir):
+            zi = zipfile.ZipInfo(arcname, date_time=time.localtime(st.st_mtime)[:6])
+            zi.external_attr = (st.st_mode & 0xFFFF) << 16
+            zi.file_size = st.st_size
+            if st.st_size == 0:
+                zi.compress_type = zipfile.ZIP_STORED
+                zf.writestr(zi, b"")
                 continue
-            arcname = file_path.relative_to(project_dir)
-            zf.write(file_path, arcname)
+            if os.path.splitext(arcname)[1].lower() in STORED_SUFFIXES:
+                zi.compress_type = zipfile.ZIP_STORED
+            else:
+                zi.compress_type = zipfile.ZIP_DEFLATED
+            with open(file_path, "rb") as src, zf.open(zi, "w") as dst:
+                shutil.copyfileobj(src, dst, EXPORT_COPY_CHUNK)
     buf.seek(0)
 
     return StreamingResponse(
@@ -213,26 +260,21 @@ async def import_project(file: UploadFile) -> ProjectInfo:
 
     # Derive project name from zip filename
     base_name = Path(file.filename).stem
-    project_id = re.sub(r"[^a-z0-9_-]", "", base_name.lower().replace(" ", "-"))
+    project_id = _SLUG_RE.sub("", base_name.lower().replace(" ", "-"))
     if not project_id:
         project_id = f"import-{uuid.uuid4().hex[:6]}"
-    existing = list_projects()
-    if project_id in existing:
-        project_id = f"{project_id}-{uuid.uuid4().hex[:6]}"
-
-    project_dir = get_project_dir(project_id)
-    project_dir.mkdir(parents=True, exist_ok=True)
+    project_id, project_dir = _claim_project_dir(project_id)
     resolved_root = project_dir.resolve()
 
     with zipfile.ZipFile(buf, "r") as zf:
         members = zf.namelist()
         if len(members) > MAX_ZIP_ENTRIES:
-            shutil.rmtree(project_dir, ignore_errors=True)
+            await asyncio.to_thread(shutil.rmtree, project_dir, ignore_errors=True)
             raise HTTPException(status_code=400, detail=f"ZIP contains too many entries (max {MAX_ZIP_ENTRIES})")
         for member in members:
             member_path = (project_dir / member).resolve()
             if not str(member_path).startswith(str(resolved_root)):
-                shutil.rmtree(project_dir, ignore_errors=True)
+                await asyncio.to_thread(shutil.rmtree, project_dir, ignore_errors=True)
                 raise HTTPException(status_code=400, detail="ZIP contains invalid path traversal entries")
         zf.extractall(project_dir)
 
@@ -243,5 +285,6 @@ async def import_project(file: UploadFile) -> ProjectInfo:
     if not meta_path.exists():
         now = datetime.now(timezone.utc).isoformat()
         atomic_write_json(meta_path, {"name": base_name, "created_at": now, "updated_at": now})
+        return ProjectInfo(id=project_id, name=base_name, created_at=now, updated_at=now)
 
     return _load_project_info(project_id)
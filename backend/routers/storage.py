@@ -1,7 +1,7 @@
 """Storage usage, quota management, cost tracking, and connectivity endpoints."""
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, Response
 
 from backend.config import get_config, save_config
 from backend.models.project import (
@@ -20,7 +20,7 @@ from backend.services.cost_estimator import (
     get_session_total,
     get_spend_log_path,
 )
-from backend.services.model_recommender import get_fallback_suggestion
+from backend.services.model_recommender import get_fallback_json
 from backend.utils.connectivity import check_connectivity, get_status
 from backend.utils.storage import IMAGEGEN_DIR, get_dir_size, get_project_dir, list_projects, read_json
 
@@ -101,8 +101,8 @@ async def set_spend_limit(request: SetSpendLimitRequest) -> dict:
     return {"spend_limit": request.limit}
 
 
-@router.get("/cost-tracking/export")
-async def export_cost_log() -> Response:
+@router.get("/cost-tracking/export", response_model=None)
+async def export_cost_log() -> Response | FileResponse:
     log_path = get_spend_log_path()
     if not log_path.exists():
         return Response(
@@ -110,11 +110,7 @@ async def export_cost_log() -> Response:
             media_type="text/csv",
             headers={"Content-Disposition": 'attachment; filename="imagegen_spend_log.csv"'},
         )
-    return Response(
-        content=log_path.read_text(encoding="utf-8"),
-        media_type="text/csv",
-        headers={"Content-Disposition": 'attachment; filename="imagegen_spend_log.csv"'},
-    )
+    return FileResponse(log_path, media_type="text/csv", filename="imagegen_spend_log.csv")
 
 
 # --- Connectivity ---
@@ -131,9 +127,9 @@ async def get_connectivity() -> ConnectivityStatusResponse:
 
 # --- Fallback Suggestions ---
 
-@router.get("/fallback/{model_id}")
-async def get_fallback(model_id: str) -> FallbackSuggestion:
-    suggestion = get_fallback_suggestion(model_id)
-    if not suggestion:
+@router.get("/fallback/{model_id}", response_model=FallbackSuggestion)
+async def get_fallback(model_id: str) -> Response:
+    suggestion = get_fallback_json(model_id)
+    if suggestion is None:
         raise HTTPException(status_code=404, detail="No fallback available")
-    return suggestion
+    return Response(content=suggestion, media_type="application/json")
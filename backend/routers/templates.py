@@ -1,5 +1,6 @@
 """Prompt template endpoints: built-in and user templates."""
 
+import functools
 import uuid
 from datetime import datetime, timezone
 
@@ -90,29 +91,44 @@ BUILTIN_TEMPLATES: list[dict] = [
 ]
 
 
+@functools.lru_cache(maxsize=1)
 def _get_user_templates_path():
     templates_dir = get_templates_dir()
     templates_dir.mkdir(parents=True, exist_ok=True)
     return templates_dir / "user.json"
 
 
-def _load_user_templates() -> list[dict]:
-    path = _get_user_templates_path()
-    data = read_json(path)
-    if not isinstance(data, list):
-        return []
-    return data
+TEMPLATES_FORMAT_VERSION = 2
+
 
+def _load_user_templates() -> dict[str, dict]:
+    """Load user templates keyed by id.
 
-def _save_user_templates(templates: list[dict]) -> None:
-    atomic_write_json(_get_user_templates_path(), templates)
+    Reads the v2 ``{"version": 2, "templates": {id: template}}`` layout and
+    falls back to the legacy flat list written by earlier versions.
+    """
+    path = _get_user_templates_path()
+    data = read_json(path)
+    if isinstance(data, dict):
+        templates = data.get("templates")
+        return templates if isinstance(templates, dict) else {}
+    if isinstance(data, list):
+        return {t["id"]: t for t in data if isinstance(t, dict) and "id" in t}
+    return {}
+
+
+def _save_user_templates(templates: dict[str, dict]) -> None:
+    atomic_write_json(
+        _get_user_templates_path(),
+        {"version": TEMPLATES_FORMAT_VERSION, "templates": templates},
+    )
 
 
 @router.get("/templates", response_model=TemplateListResponse)
 async def list_templates() -> TemplateListResponse:
     builtin = [PromptTemplate(**t) for t in BUILTIN_TEMPLATES]
     user_data = _load_user_templates()
-    user = [PromptTemplate(**t) for t in user_data]
+    user = [PromptTemplate(**t) for t in user_data.values()]
     return TemplateListResponse(builtin=builtin, user=user)
 
 
@@ -132,7 +148,7 @@ async def create_template(request: CreateTemplateRequest) -> PromptTemplate:
     )
 
     templates = _load_user_templates()
-    templates.append(template.model_dump())
+    templates[template_id] = template.model_dump()
     _save_user_templates(templates)
 
     return template
@@ -144,21 +160,20 @@ async def update_template(template_id: str, request: UpdateTemplateRequest) -> P
         raise HTTPException(status_code=400, detail="Cannot edit built-in templates")
 
     templates = _load_user_templates()
-    for i, t in enumerate(templates):
-        if t.get("id") == template_id:
-            if request.name is not None:
-                t["name"] = request.name.strip()
-            if request.category is not None:
-                t["category"] = request.category.strip()
-            if request.prompt_text is not None:
-                t["prompt_text"] = request.prompt_text
-            if request.tags is not None:
-                t["tags"] = request.tags
-            templates[i] = t
-            _save_user_templates(templates)
-            return PromptTemplate(**t)
-
-    raise HTTPException(status_code=404, detail="Template not found")
+    t = templates.get(template_id)
+    if t is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    if request.name is not None:
+        t["name"] = request.name.strip()
+    if request.category is not None:
+        t["category"] = request.category.strip()
+    if request.prompt_text is not None:
+        t["prompt_text"] = request.prompt_text
+    if request.tags is not None:
+        t["tags"] = request.tags
+    _save_user_templates(templates)
+    return PromptTemplate(**t)
 
 
 @router.delete("/templates/{template_id}")
@@ -167,9 +182,8 @@ async def delete_template(template_id: str) -> dict:
         raise HTTPException(status_code=400, detail="Cannot delete built-in templates")
 
     templates = _load_user_templates()
-    updated = [t for t in templates if t.get("id") != template_id]
-    if len(updated) == len(templates):
+    if templates.pop(template_id, None) is None:
         raise HTTPException(status_code=404, detail="Template not found")
 
-    _save_user_templates(updated)
+    _save_user_templates(templates)
     return {"deleted": True}
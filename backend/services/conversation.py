@@ -1,5 +1,8 @@
 """Multi-turn conversation state management with branching and persistence."""
 
+import asyncio
+import functools
+import os
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -11,7 +14,16 @@ from backend.models.conversation import (
     ConversationSessionSummary,
     ConversationTurn,
 )
-from backend.utils.storage import atomic_write_json, get_project_dir, read_json
+from backend.utils.storage import (
+    append_json_line,
+    append_json_lines,
+    atomic_write_msgpack,
+    get_project_dir,
+    read_json,
+    read_json_lines,
+    read_msgpack,
+    write_json_in_place,
+)
 
 # Rough token estimate: 4 chars per token (conservative)
 CHARS_PER_TOKEN = 4
@@ -23,8 +35,30 @@ MODEL_CONTEXT_LIMITS: dict[str, int] = {
     "google/gemini-3-pro-image-preview": 128_000,
     "openai/gpt-5-image": 128_000,
 }
-
-
+# Mutations are appended to a per-session event log; after this many the
+# log is folded into a fresh snapshot and truncated
+SNAPSHOT_EVERY = 50
+# Logged events are buffered and written together once a session has been
+# quiet for this long (seconds), or at the end of the request
+SESSION_WRITE_DELAY = 0.05
+
+# Per-project index of session summaries, so listing never parses sessions
+SESSIONS_INDEX_NAME = "sessions_index.json"
+
+# Buffered events, the sessions they belong to, and their pending flush
+# timers, keyed by (project, session_id)
+_pending_events: dict[tuple[str, str], list[dict]] = {}
+_pending_sessions: dict[tuple[str, str], ConversationSession] = {}
+_flush_timers: dict[tuple[str, str], asyncio.TimerHandle] = {}
+# In-memory copy of each project's sessions index, loaded on first use
+_session_indexes: dict[str, dict[str, dict]] = {}
+# Projects whose in-memory index has changes not yet written to disk
+_dirty_indexes: set[str] = set()
+
+
+# mkdir only needs to run once per project per process. Sessions always
+# live in the default project, which can't be deleted out from under us
+@functools.lru_cache(maxsize=32)
 def _get_conversations_dir(project: str = "default") -> Path:
     d = get_project_dir(project) / "conversations"
     d.mkdir(parents=True, exist_ok=True)
@@ -35,6 +69,158 @@ def _session_path(session_id: str, project: str = "default") -> Path:
     return _get_conversations_dir(project) / f"{session_id}.json"
 
 
+def _msgpack_path(session_id: str, project: str = "default") -> Path:
+    return _get_conversations_dir(project) / f"{session_id}.msgpack"
+
+
+def _log_path(session_id: str, project: str = "default") -> Path:
+    return _get_conversations_dir(project) / f"{session_id}.log.jsonl"
+
+
+def _index_path(project: str = "default") -> Path:
+    return _get_conversations_dir(project) / SESSIONS_INDEX_NAME
+
+
+def _summarize(session: ConversationSession) -> dict:
+    """Build the list-view summary fields for a session."""
+    active_branch = get_active_branch(session)
+    turn_count = len(active_branch.turns) if active_branch else 0
+    last_image = None
+    if active_branch and active_branch.turns:
+        for t in reversed(active_branch.turns):
+            if t.image_url:
+                last_image = t.image_url
+                break
+    return {
+        "session_id": session.session_id,
+        "model_id": session.model_id,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "turn_count": turn_count,
+        "branch_count": len(session.branches),
+        "last_image_url": last_image,
+    }
+
+
+def _scan_session_ids(project: str) -> set[str]:
+    """Return the ids of all session snapshots on disk (names only, no stat)."""
+    session_ids = set()
+    with os.scandir(_get_conversations_dir(project)) as it:
+        for entry in it:
+            stem, ext = os.path.splitext(entry.name)
+            if ext in (".json", ".msgpack") and entry.name != SESSIONS_INDEX_NAME:
+                session_ids.add(stem)
+    return session_ids
+
+
+def _sync_session_index(project: str, index: dict[str, dict], session_ids: set[str]) -> None:
+    """Bring the index in line with the snapshots on disk and save it.
+
+    Sessions missing from the index (saved before it existed, or copied in
+    by hand) are loaded once to summarize them; entries without a
+    snapshot are dropped.
+    """
+    for session_id in index.keys() - session_ids:
+        del index[session_id]
+    for session_id in session_ids - index.keys():
+        session = load_session(session_id, project)
+        if session is not None:
+            index[session_id] = _summarize(session)
+    _write_session_index(project)
+
+
+def _refresh_stale_entries(project: str, index: dict[str, dict], index_mtime_ns: int) -> None:
+    """Re-summarize sessions whose event log changed after the index was written.
+
+    Logged mutations only update the index in memory, so after a crash the
+    saved summaries of those sessions can lag behind their logs.
+    """
+    stale = []
+    with os.scandir(_get_conversations_dir(project)) as it:
+        for entry in it:
+            if entry.name.endswith(".log.jsonl") and entry.stat().st_mtime_ns >= index_mtime_ns:
+                stale.append(entry.name[: -len(".log.jsonl")])
+    for session_id in stale:
+        if session_id in index:
+            session = load_session(session_id, project)
+            if session is not None:
+                index[session_id] = _summarize(session)
+                _dirty_indexes.add(project)
+
+
+def _get_session_index(project: str) -> dict[str, dict]:
+    """Return a project's sessions index, loading or rebuilding it on first use."""
+    index = _session_indexes.get(project)
+    if index is None:
+        path = _index_path(project)
+        try:
+            index_mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            index_mtime_ns = None
+        data = read_json(path) if index_mtime_ns is not None else None
+        index = data if isinstance(data, dict) else {}
+        _session_indexes[project] = index
+        if not isinstance(data, dict):
+            _sync_session_index(project, index, _scan_session_ids(project))
+        else:
+            _refresh_stale_entries(project, index, index_mtime_ns)
+    return index
+
+
+def _write_session_index(project: str) -> None:
+    """Save a project's in-memory sessions index to disk."""
+    write_json_in_place(_index_path(project), _session_indexes[project])
+    _dirty_indexes.discard(project)
+
+
+def flush_session_indexes() -> None:
+    """Save any sessions indexes with unsaved changes (listing and shutdown)."""
+    for project in list(_dirty_indexes):
+        _write_session_index(project)
+
+
+def _update_session_index(session: ConversationSession, persist: bool = False) -> None:
+    """Record a session's current summary in its project's index.
+
+    Per-mutation updates stay in memory so their cost doesn't grow with
+    the number of sessions; pass persist=True to save the index now.
+    """
+    index = _get_session_index(session.project)
+    index[session.session_id] = _summarize(session)
+    if persist:
+        _write_session_index(session.project)
+    else:
+        _dirty_indexes.add(session.project)
+
+
+def _flush_session(key: tuple[str, str]) -> None:
+    """Write one session's buffered events to its log in a single append."""
+    timer = _flush_timers.pop(key, None)
+    if timer is not None:
+        timer.cancel()
+    events = _pending_events.pop(key, None)
+    session = _pending_sessions.pop(key, None)
+    if events:
+        project, session_id = key
+        append_json_lines(_log_path(session_id, project), events)
+        _update_session_index(session)
+
+
+def _discard_pending(key: tuple[str, str]) -> None:
+    """Drop a session's buffered events without writing them."""
+    timer = _flush_timers.pop(key, None)
+    if timer is not None:
+        timer.cancel()
+    _pending_events.pop(key, None)
+    _pending_sessions.pop(key, None)
+
+
+def flush_session_writes() -> None:
+    """Write all buffered session events now (request end and shutdown)."""
+    for key in list(_pending_events):
+        _flush_session(key)
+
+
 def create_session(model_id: str, project: str = "default") -> ConversationSession:
     """Create a new conversation session."""
     now = datetime.now(timezone.utc).isoformat()
@@ -54,65 +240,173 @@ def create_session(model_id: str, project: str = "default") -> ConversationSessi
 
 
 def save_session(session: ConversationSession) -> None:
-    """Persist session to disk."""
+    """Persist a full snapshot of the session and truncate its event log.
+
+    The snapshot records the last event sequence number it contains, so a
+    crash between writing it and removing the log can't replay events twice.
+    """
+    # The snapshot already reflects any events still waiting to be written
+    _discard_pending((session.project, session.session_id))
     session.updated_at = datetime.now(timezone.utc).isoformat()
-    path = _session_path(session.session_id, session.project)
-    atomic_write_json(path, session.model_dump())
+    snapshot = session.model_dump()
+    snapshot["log_seq"] = session._log_seq
+    atomic_write_msgpack(_msgpack_path(session.session_id, session.project), snapshot)
+    # Drop any pre-msgpack snapshot so it can't shadow this one
+    _session_path(session.session_id, session.project).unlink(missing_ok=True)
+    _log_path(session.session_id, session.project).unlink(missing_ok=True)
+    session._log_events = 0
+    _update_session_index(session, persist=True)
+
+
+def _append_event(session: ConversationSession, event: dict) -> None:
+    """Persist one mutation by appending it to the session's event log.
+
+    Cost is O(1) in session size; the log is compacted into a snapshot
+    every SNAPSHOT_EVERY events. Inside an event loop the write is
+    debounced so a burst of mutations costs a single append.
+    """
+    session.updated_at = datetime.now(timezone.utc).isoformat()
+    session._log_seq += 1
+    event["seq"] = session._log_seq
+    event["updated_at"] = session.updated_at
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        append_json_line(_log_path(session.session_id, session.project), event)
+        _update_session_index(session)
+    else:
+        key = (session.project, session.session_id)
+        _pending_events.setdefault(key, []).append(event)
+        _pending_sessions[key] = session
+        timer = _flush_timers.get(key)
+        if timer is not None:
+            timer.cancel()
+        _flush_timers[key] = loop.call_later(SESSION_WRITE_DELAY, _flush_session, key)
+    session._log_events += 1
+    if session._log_events >= SNAPSHOT_EVERY:
+        save_session(session)
+
+
+def _replay_event(session: ConversationSession, event: dict) -> None:
+    """Apply a logged mutation to a session loaded from its snapshot."""
+    op = event.get("op")
+    if op == "switch_branch":
+        session.active_branch_id = event["branch_id"]
+    elif op == "subject_lock":
+        session.subject_locked = event["locked"]
+        session.subject_lock_image_id = event.get("image_id")
+    elif op == "branch":
+        new_branch = ConversationBranch(**event["branch"])
+        parent = _get_branch(session, new_branch.parent_branch_id)
+        if parent is not None and new_branch.fork_turn_index is not None:
+            new_branch.turns = list(parent.turns[: new_branch.fork_turn_index + 1])
+        _add_branch(session, new_branch)
+        session.active_branch_id = new_branch.branch_id
+    else:
+        branch = _get_branch(session, event.get("branch_id"))
+        if branch is None:
+            return
+        if op == "add_turn":
+            branch.turns.append(ConversationTurn(**event["turn"]))
+        elif op == "undo":
+            if branch.turns:
+                branch.turns.pop()
+        elif op == "revert":
+            branch.turns = branch.turns[: event["turn_index"] + 1]
 
 
 def load_session(session_id: str, project: str = "default") -> ConversationSession | None:
-    """Load a session from disk."""
-    path = _session_path(session_id, project)
-    data = read_json(path)
+    """Load a session from its snapshot and replay any logged mutations.
+
+    Binary .msgpack snapshots are preferred; .json snapshots from older
+    versions are read as a fallback.
+    """
+    _flush_session((project, session_id))
+    data = read_msgpack(_msgpack_path(session_id, project))
+    if data is None:
+        data = read_json(_session_path(session_id, project))
     if not data or not isinstance(data, dict):
         return None
-    return ConversationSession(**data)
+    snapshot_seq = data.pop("log_seq", 0)
+    session = ConversationSession(**data)
+    session._log_seq = snapshot_seq
+
+    for event in read_json_lines(_log_path(session_id, project)):
+        if not isinstance(event, dict) or event.get("seq", 0) <= snapshot_seq:
+            continue
+        _replay_event(session, event)
+        session._log_seq = event["seq"]
+        session.updated_at = event.get("updated_at", session.updated_at)
+        session._log_events += 1
+    return session
 
 
 def list_sessions(project: str = "default") -> list[ConversationSessionSummary]:
-    """List all conversation sessions as summaries."""
-    conv_dir = _get_conversations_dir(project)
-    summaries = []
-    for path in sorted(conv_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
-        data = read_json(path)
-        if not data or not isinstance(data, dict):
-            continue
-        session = ConversationSession(**data)
-        active_branch = get_active_branch(session)
-        turn_count = len(active_branch.turns) if active_branch else 0
-        last_image = None
-        if active_branch and active_branch.turns:
-            for t in reversed(active_branch.turns):
-                if t.image_url:
-                    last_image = t.image_url
-                    break
-        summaries.append(ConversationSessionSummary(
-            session_id=session.session_id,
-            model_id=session.model_id,
-            created_at=session.created_at,
-            updated_at=session.updated_at,
-            turn_count=turn_count,
-            branch_count=len(session.branches),
-            last_image_url=last_image,
-        ))
+    """List all conversation sessions as summaries, most recently updated first."""
+    flush_session_writes()
+    index = _get_session_index(project)
+    session_ids = _scan_session_ids(project)
+    if session_ids != index.keys():
+        _sync_session_index(project, index, session_ids)
+    elif project in _dirty_indexes:
+        _write_session_index(project)
+    summaries = [ConversationSessionSummary(**entry) for entry in index.values()]
+    summaries.sort(key=lambda s: s.updated_at, reverse=True)
     return summaries
 
 
 def delete_session(session_id: str, project: str = "default") -> bool:
     """Delete a session from disk."""
-    path = _session_path(session_id, project)
-    if path.exists():
-        path.unlink()
-        return True
-    return False
+    _discard_pending((project, session_id))
+    found = False
+    for path in (_msgpack_path(session_id, project), _session_path(session_id, project)):
+        if path.exists():
+            path.unlink()
+            found = True
+    if found:
+        _log_path(session_id, project).unlink(missing_ok=True)
+        index = _get_session_index(project)
+        if index.pop(session_id, None) is not None:
+            _write_session_index(project)
+    return found
+
+
+def _turn_chars(turn: ConversationTurn) -> int:
+    """Return the turn's prompt + response length."""
+    return len(turn.prompt or "") + len(turn.text_response or "")
+
+
+def _char_counts(branch: ConversationBranch) -> list[int]:
+    """Return the branch's per-turn char counts, computing them once if needed."""
+    if branch._char_counts is None:
+        branch._char_counts = [_turn_chars(t) for t in branch.turns]
+        branch._total_chars = sum(branch._char_counts)
+    return branch._char_counts
+
+
+def _branch_chars(branch: ConversationBranch) -> int:
+    """Return the branch's total char count, computing it once if needed."""
+    _char_counts(branch)
+    return branch._total_chars
+
+
+def _get_branch(session: ConversationSession, branch_id: str | None) -> ConversationBranch | None:
+    """Look up a branch by id, building the session's branch index on first use."""
+    if session._branch_index is None:
+        session._branch_index = {b.branch_id: b for b in session.branches}
+    return session._branch_index.get(branch_id)
+
+
+def _add_branch(session: ConversationSession, branch: ConversationBranch) -> None:
+    """Append a branch to the session, keeping the branch index in sync."""
+    session.branches.append(branch)
+    if session._branch_index is not None:
+        session._branch_index[branch.branch_id] = branch
 
 
 def get_active_branch(session: ConversationSession) -> ConversationBranch | None:
     """Get the currently active branch."""
-    for branch in session.branches:
-        if branch.branch_id == session.active_branch_id:
-            return branch
-    return None
+    return _get_branch(session, session.active_branch_id)
 
 
 def add_turn(
@@ -142,7 +436,11 @@ def add_turn(
         usage=usage,
     )
     branch.turns.append(turn)
-    save_session(session)
+    if branch._char_counts is not None:
+        chars = _turn_chars(turn)
+        branch._char_counts.append(chars)
+        branch._total_chars += chars
+    _append_event(session, {"op": "add_turn", "branch_id": branch.branch_id, "turn": turn.model_dump()})
     return turn
 
 
@@ -152,7 +450,9 @@ def undo_turn(session: ConversationSession) -> bool:
     if not branch or not branch.turns:
         return False
     branch.turns.pop()
-    save_session(session)
+    if branch._char_counts is not None:
+        branch._total_chars -= branch._char_counts.pop()
+    _append_event(session, {"op": "undo", "branch_id": branch.branch_id})
     return True
 
 
@@ -162,7 +462,10 @@ def revert_to_turn(session: ConversationSession, turn_index: int) -> bool:
     if not branch or turn_index < 0 or turn_index >= len(branch.turns):
         return False
     branch.turns = branch.turns[: turn_index + 1]
-    save_session(session)
+    if branch._char_counts is not None:
+        del branch._char_counts[turn_index + 1:]
+        branch._total_chars = sum(branch._char_counts)
+    _append_event(session, {"op": "revert", "branch_id": branch.branch_id, "turn_index": turn_index})
     return True
 
 
@@ -180,20 +483,22 @@ def branch_from_turn(session: ConversationSession, turn_index: int) -> Conversat
         fork_turn_index=turn_index,
         turns=list(active_branch.turns[: turn_index + 1]),
     )
-    session.branches.append(new_branch)
+    new_branch._char_counts = _char_counts(active_branch)[: turn_index + 1]
+    new_branch._total_chars = sum(new_branch._char_counts)
+    _add_branch(session, new_branch)
     session.active_branch_id = new_branch.branch_id
-    save_session(session)
+    # Only branch metadata is logged; replay re-copies the parent's turn prefix
+    _append_event(session, {"op": "branch", "branch": new_branch.model_dump(exclude={"turns"})})
     return new_branch
 
 
 def switch_branch(session: ConversationSession, branch_id: str) -> bool:
     """Switch the active branch."""
-    for branch in session.branches:
-        if branch.branch_id == branch_id:
-            session.active_branch_id = branch_id
-            save_session(session)
-            return True
-    return False
+    if _get_branch(session, branch_id) is None:
+        return False
+    session.active_branch_id = branch_id
+    _append_event(session, {"op": "switch_branch", "branch_id": branch_id})
+    return True
 
 
 def build_conversation_messages(session: ConversationSession) -> list[dict]:
@@ -205,17 +510,15 @@ def build_conversation_messages(session: ConversationSession) -> list[dict]:
     if not branch:
         return []
 
-    messages: list[dict] = []
-    for turn in branch.turns:
-        if turn.role == "user" and turn.prompt:
-            content: list[dict] = [{"type": "text", "text": turn.prompt}]
-            messages.append({"role": "user", "content": content})
-        elif turn.role == "assistant":
-            # Include text response if present
-            assistant_content = turn.text_response or ""
-            messages.append({"role": "assistant", "content": assistant_content})
-
-    return messages
+    # User turns without a prompt are skipped; assistant turns always
+    # contribute their text response (empty if none)
+    return [
+        {"role": "user", "content": [{"type": "text", "text": turn.prompt}]}
+        if turn.role == "user"
+        else {"role": "assistant", "content": turn.text_response or ""}
+        for turn in branch.turns
+        if (turn.role == "user" and turn.prompt) or turn.role == "assistant"
+    ]
 
 
 def estimate_token_usage(session: ConversationSession) -> dict:
@@ -227,14 +530,7 @@ def estimate_token_usage(session: ConversationSession) -> dict:
     if not branch:
         return {"estimated_tokens": 0, "context_limit": 0, "usage_ratio": 0.0, "near_limit": False}
 
-    total_chars = 0
-    for turn in branch.turns:
-        if turn.prompt:
-            total_chars += len(turn.prompt)
-        if turn.text_response:
-            total_chars += len(turn.text_response)
-
-    estimated_tokens = total_chars // CHARS_PER_TOKEN
+    estimated_tokens = _branch_chars(branch) // CHARS_PER_TOKEN
     context_limit = MODEL_CONTEXT_LIMITS.get(session.model_id, 128_000)
     usage_ratio = estimated_tokens / context_limit if context_limit > 0 else 0.0
 
@@ -254,4 +550,8 @@ def set_subject_lock(
     """Set or clear the subject lock for a session."""
     session.subject_locked = locked
     session.subject_lock_image_id = image_id if locked else None
-    save_session(session)
+    _append_event(session, {
+        "op": "subject_lock",
+        "locked": locked,
+        "image_id": session.subject_lock_image_id,
+    })
@@ -1,10 +1,18 @@
 """Per-model cost estimation based on OpenRouter pricing, with spend logging."""
 
+import atexit
 import csv
+import io
+import os
 from datetime import datetime, timezone
 
 from backend.config import MODELS
-from backend.utils.storage import get_spend_log_path
+from backend.utils.storage import (
+    get_spend_log_path,
+    get_spend_totals_path,
+    read_json,
+    write_json_in_place,
+)
 
 # Resolution multipliers (relative to 1K base cost)
 RESOLUTION_MULTIPLIERS: dict[str, float] = {
@@ -84,6 +92,57 @@ _session_total: float = 0.0
 
 CSV_HEADERS = ["date", "model_id", "model_name", "resolution", "variations", "estimated_cost"]
 
+# Block size for reading the spend log backwards from the end
+TAIL_BLOCK_SIZE = 8192
+
+# Long-lived append handle on the spend log, opened on first use
+_spend_file: io.TextIOWrapper | None = None
+_spend_writer = None
+# Last totals written to the sidecar by this process
+_totals: dict | None = None
+
+
+def _rebuild_totals(log_size: int) -> dict:
+    """Recompute the totals sidecar from a full pass over the spend log CSV."""
+    total = 0.0
+    count = 0
+    log_path = get_spend_log_path()
+    if log_path.exists():
+        with open(log_path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                count += 1
+                try:
+                    total += float(row.get("estimated_cost", 0))
+                except (ValueError, TypeError):
+                    pass
+    totals = {"total": total, "count": count, "size": log_size}
+    write_json_in_place(get_spend_totals_path(), totals)
+    return totals
+
+
+def _load_totals() -> dict:
+    """Load the totals sidecar, rebuilding it if it's missing or out of step with the CSV.
+
+    The recorded CSV size catches a crash between the log append and the
+    sidecar write, or a log that was edited by hand.
+    """
+    log_path = get_spend_log_path()
+    log_size = log_path.stat().st_size if log_path.exists() else 0
+    totals = read_json(get_spend_totals_path())
+    if not isinstance(totals, dict) or totals.get("size") != log_size:
+        return _rebuild_totals(log_size)
+    return totals
+
+
+def _get_spend_writer():
+    """Return the (file, csv.writer) pair for appending to the spend log."""
+    global _spend_file, _spend_writer
+    if _spend_file is None:
+        _spend_file = open(get_spend_log_path(), "a", newline="", encoding="utf-8")
+        _spend_writer = csv.writer(_spend_file)
+        atexit.register(_spend_file.close)
+    return _spend_file, _spend_writer
+
 
 def log_spend(
     model_id: str,
@@ -100,14 +159,25 @@ def log_spend(
     model_name = model.get("name", model_id)
     now = datetime.now(timezone.utc).isoformat()
 
-    log_path = get_spend_log_path()
-    write_header = not log_path.exists() or log_path.stat().st_size == 0
-
-    with open(log_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if write_header:
-            writer.writerow(CSV_HEADERS)
-        writer.writerow([now, model_id, model_name, resolution, variations, f"{cost:.6f}"])
+    global _totals
+    f, writer = _get_spend_writer()
+    # fstat rather than tell(): another writer may have appended since our
+    # last write. Totals are only reloaded from disk if the size has moved
+    size = os.fstat(f.fileno()).st_size
+    if _totals is None or _totals["size"] != size:
+        _totals = _load_totals()
+    if size == 0:
+        writer.writerow(CSV_HEADERS)
+    writer.writerow([now, model_id, model_name, resolution, variations, f"{cost:.6f}"])
+    f.flush()
+
+    # Totals track the rounded value actually written to the CSV
+    _totals = {
+        "total": _totals["total"] + float(f"{cost:.6f}"),
+        "count": _totals["count"] + 1,
+        "size": os.fstat(f.fileno()).st_size,
+    }
+    write_json_in_place(get_spend_totals_path(), _totals)
 
     return cost
 
@@ -118,36 +188,46 @@ def get_session_total() -> float:
 
 
 def get_all_time_total() -> float:
-    """Sum all estimated costs from the spend log CSV."""
-    log_path = get_spend_log_path()
-    if not log_path.exists():
-        return 0.0
-    total = 0.0
-    with open(log_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                total += float(row.get("estimated_cost", 0))
-            except (ValueError, TypeError):
-                pass
-    return total
+    """Return the sum of all estimated costs in the spend log."""
+    return _load_totals()["total"]
+
+
+def _read_tail_lines(log_path, limit: int) -> list[str]:
+    """Read up to ``limit`` complete lines from the end of a file, in order."""
+    with open(log_path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        buf = b""
+        # limit + 1 newlines guarantees the first kept line is complete
+        while pos > 0 and buf.count(b"\n") <= limit:
+            step = min(TAIL_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.decode("utf-8", errors="replace").splitlines()
+    if pos > 0:
+        # First line may be a partial row cut by the block boundary
+        lines = lines[1:]
+    return lines[-limit:]
 
 
 def get_recent_entries(limit: int = 50) -> list[dict]:
     """Read the most recent spend log entries."""
     log_path = get_spend_log_path()
-    if not log_path.exists():
+    if not log_path.exists() or limit <= 0:
         return []
+    lines = _read_tail_lines(log_path, limit + 1)
+    if lines and lines[0] == ",".join(CSV_HEADERS):
+        lines = lines[1:]
     entries: list[dict] = []
-    with open(log_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            entries.append({
-                "date": row.get("date", ""),
-                "model_id": row.get("model_id", ""),
-                "model_name": row.get("model_name", ""),
-                "resolution": row.get("resolution", "1K"),
-                "variations": int(row.get("variations", 1)),
-                "estimated_cost": float(row.get("estimated_cost", 0)),
-            })
+    reader = csv.DictReader(io.StringIO("\n".join(lines)), fieldnames=CSV_HEADERS)
+    for row in reader:
+        entries.append({
+            "date": row.get("date", ""),
+            "model_id": row.get("model_id", ""),
+            "model_name": row.get("model_name", ""),
+            "resolution": row.get("resolution", "1K"),
+            "variations": int(row.get("variations", 1)),
+            "estimated_cost": float(row.get("estimated_cost", 0)),
+        })
     return entries[-limit:]
@@ -39,7 +39,7 @@ def add_history_entry(
     entry.update(extras)
 
     history_path = get_project_dir(project) / "history.json"
-    history = read_json(history_path)
+    history = read_json(history_path, default=list)
     if not isinstance(history, list):
         history = []
     history.append(entry)
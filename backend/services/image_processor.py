@@ -1,10 +1,10 @@
 """Image processing: save, thumbnail generation, export, reference image prep."""
 
-import base64
 import io
 import uuid
 from pathlib import Path
 
+import pybase64
 from PIL import Image
 
 # Enforce decompression bomb limit (Pillow default is a warning; we make it an error)
@@ -12,6 +12,10 @@ Image.MAX_IMAGE_PIXELS = 178_956_970
 
 MAX_DIMENSION = 4096
 MAX_UPLOAD_BYTES = 20 * 1024 * 1024  # 20MB
+THUMBNAIL_MAX_SIZE = 256
+THUMBNAIL_COMPRESS_LEVEL = 1  # zlib level for thumbnail PNGs (Pillow default is 6)
+# JPEG quality tiers tried by compress_for_size_limit, best first
+COMPRESS_QUALITIES = (85, 70, 55, 40)
 
 EXPORT_MIME_TYPES = {
     "png": "image/png",
@@ -21,10 +25,19 @@ EXPORT_MIME_TYPES = {
 
 
 def _strip_metadata(img: Image.Image) -> Image.Image:
-    """Return a copy of the image with all metadata stripped."""
-    clean = img.copy()
-    clean.info = {}
-    return clean
+    """Strip all metadata from an image in place and return it.
+
+    Only call this on images owned by the caller; no pixel data is copied.
+    """
+    img.info = {}
+    return img
+
+
+def _encode(img: Image.Image, fmt: str, **params) -> bytes:
+    """Encode an image in memory and return the bytes."""
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
 
 
 def save_image(image_data: bytes, filepath: Path) -> None:
@@ -32,26 +45,28 @@ def save_image(image_data: bytes, filepath: Path) -> None:
     img = Image.open(io.BytesIO(image_data))
     try:
         img.load()
-        clean = _strip_metadata(img)
-        clean.save(filepath, "PNG")
-        clean.close()
+        _strip_metadata(img).save(filepath, "PNG")
     finally:
         img.close()
 
 
+def _write_thumbnail(img: Image.Image, thumbnail_path: Path, max_size: int) -> None:
+    """Shrink an owned image in place and save it as a clean PNG thumbnail."""
+    img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    # Thumbnails are small and regenerable; favour encode speed over size
+    _strip_metadata(img).save(thumbnail_path, "PNG", compress_level=THUMBNAIL_COMPRESS_LEVEL)
+
+
 def generate_thumbnail(
     source_path: Path,
     thumbnail_path: Path,
-    max_size: int = 256,
+    max_size: int = THUMBNAIL_MAX_SIZE,
 ) -> None:
     """Generate a thumbnail with the longest side equal to max_size."""
+    # No explicit load(): thumbnail() drafts JPEG sources at reduced scale first
     img = Image.open(source_path)
     try:
-        img.load()
-        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-        clean = _strip_metadata(img)
-        clean.save(thumbnail_path, "PNG")
-        clean.close()
+        _write_thumbnail(img, thumbnail_path, max_size)
     finally:
         img.close()
 
@@ -69,8 +84,15 @@ def save_generation_result(
     image_path = images_dir / image_filename
     thumbnail_path = thumbnails_dir / thumbnail_filename
 
-    save_image(image_data, image_path)
-    generate_thumbnail(image_path, thumbnail_path)
+    # Decode once: the thumbnail is cut from the same pixels rather than
+    # re-reading the PNG that was just written
+    img = Image.open(io.BytesIO(image_data))
+    try:
+        img.load()
+        _strip_metadata(img).save(image_path, "PNG")
+        _write_thumbnail(img, thumbnail_path, THUMBNAIL_MAX_SIZE)
+    finally:
+        img.close()
 
     return image_id, image_filename, thumbnail_filename
 
@@ -108,18 +130,11 @@ def prepare_for_export(
         if dpi is not None:
             save_kwargs["dpi"] = (dpi, dpi)
 
-        buf = io.BytesIO()
-        if fmt == "png":
-            clean.save(buf, "PNG", **save_kwargs)
-        elif fmt == "jpeg":
-            clean.save(buf, "JPEG", quality=quality, **save_kwargs)
+        if fmt == "jpeg":
+            return _encode(clean, "JPEG", quality=quality, **save_kwargs)
         elif fmt == "webp":
-            clean.save(buf, "WEBP", quality=quality, **save_kwargs)
-        else:
-            clean.save(buf, "PNG", **save_kwargs)
-
-        clean.close()
-        return buf.getvalue()
+            return _encode(clean, "WEBP", quality=quality, **save_kwargs)
+        return _encode(clean, "PNG", **save_kwargs)
     finally:
         img.close()
 
@@ -133,22 +148,37 @@ def validate_and_process_upload(image_data: bytes) -> tuple[bytes, bool]:
     if len(image_data) > MAX_UPLOAD_BYTES:
         raise ValueError(f"Image exceeds {MAX_UPLOAD_BYTES // (1024*1024)}MB limit")
 
+    # Image.open only parses the header, so oversized images are rejected
+    # before any pixel data is decoded
     try:
         img = Image.open(io.BytesIO(image_data))
-        img.load()
+    except Image.DecompressionBombError:
+        raise ValueError("Image dimensions are too large")
     except Exception:
         raise ValueError("Invalid image file")
 
     try:
-        was_resized = False
         w, h = img.size
-        longest = max(w, h)
+        if w * h > Image.MAX_IMAGE_PIXELS:
+            raise ValueError("Image dimensions are too large")
 
+        was_resized = False
+        longest = max(w, h)
+        target = None
         if longest > MAX_DIMENSION:
             ratio = MAX_DIMENSION / longest
-            new_w = int(w * ratio)
-            new_h = int(h * ratio)
-            resized = img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            target = (int(w * ratio), int(h * ratio))
+            # JPEG only: let libjpeg DCT-scale by 1/2, 1/4 or 1/8 while decoding,
+            # never below the target; LANCZOS below does the exact resize
+            img.draft("RGB", target)
+
+        try:
+            img.load()
+        except Exception:
+            raise ValueError("Invalid image file")
+
+        if target is not None:
+            resized = img.resize(target, Image.Resampling.LANCZOS)
             img.close()
             img = resized
             was_resized = True
@@ -160,9 +190,7 @@ def validate_and_process_upload(image_data: bytes) -> tuple[bytes, bool]:
             img = converted
 
         # Re-encode as JPEG for efficient base64 transfer
-        buf = io.BytesIO()
-        img.save(buf, "JPEG", quality=90)
-        return buf.getvalue(), was_resized
+        return _encode(img, "JPEG", quality=90), was_resized
     finally:
         img.close()
 
@@ -170,7 +198,7 @@ def validate_and_process_upload(image_data: bytes) -> tuple[bytes, bool]:
 def compress_for_size_limit(image_data: bytes, max_base64_bytes: int) -> bytes:
     """Iteratively compress an image until its base64 representation fits within max_base64_bytes.
 
-    Starts at quality 85 and steps down. Also resizes if quality alone isn't enough.
+    Picks the highest quality tier that fits. Also resizes if quality alone isn't enough.
     Returns JPEG bytes. Raises ValueError if it can't fit within the limit.
     """
     img = Image.open(io.BytesIO(image_data))
@@ -186,13 +214,26 @@ def compress_for_size_limit(image_data: bytes, max_base64_bytes: int) -> bytes:
             img.close()
             img = converted
 
-        for quality in (85, 70, 55, 40):
-            buf = io.BytesIO()
-            img.save(buf, "JPEG", quality=quality)
-            raw = buf.getvalue()
-            # base64 inflates by ~4/3
-            if len(raw) * 4 // 3 <= max_base64_bytes:
-                return raw
+        # Exact base64 length is 4 * ceil(n / 3), so this is the largest
+        # raw size that fits; computed once instead of per encode
+        max_raw = (max_base64_bytes // 4) * 3
+
+        # Find the highest quality tier that fits: try the top tier first
+        # (it usually fits), then bisect the rest. Size grows with quality, so
+        # this picks the same tier as a linear walk in at most 3 encodes
+        lo, hi = 0, len(COMPRESS_QUALITIES) - 1
+        mid = 0
+        best: bytes | None = None
+        while lo <= hi:
+            raw = _encode(img, "JPEG", quality=COMPRESS_QUALITIES[mid])
+            if len(raw) <= max_raw:
+                best = raw
+                hi = mid - 1
+            else:
+                lo = mid + 1
+            mid = (lo + hi) // 2
+        if best is not None:
+            return best
 
         # If quality reduction alone isn't enough, also downscale
         for scale in (0.75, 0.5):
@@ -200,11 +241,9 @@ def compress_for_size_limit(image_data: bytes, max_base64_bytes: int) -> bytes:
                 (int(img.width * scale), int(img.height * scale)),
                 Image.Resampling.LANCZOS,
             )
-            buf = io.BytesIO()
-            scaled.save(buf, "JPEG", quality=40)
+            raw = _encode(scaled, "JPEG", quality=COMPRESS_QUALITIES[-1])
             scaled.close()
-            raw = buf.getvalue()
-            if len(raw) * 4 // 3 <= max_base64_bytes:
+            if len(raw) <= max_raw:
                 return raw
 
         raise ValueError("Image too large even after aggressive compression")
@@ -212,7 +251,16 @@ def compress_for_size_limit(image_data: bytes, max_base64_bytes: int) -> bytes:
         img.close()
 
 
+def b64encode_str(data: bytes | memoryview) -> str:
+    """Base64-encode bytes straight to a str, without an intermediate bytes copy."""
+    return pybase64.b64encode_as_string(data)
+
+
+def b64decode(data: str | bytes | memoryview) -> bytes:
+    """Decode standard base64 to bytes."""
+    return pybase64.b64decode(data)
+
+
 def image_to_base64_url(image_data: bytes, mime_type: str = "image/jpeg") -> str:
     """Encode image bytes as a data URL for the OpenRouter API."""
-    b64 = base64.b64encode(image_data).decode("ascii")
-    return f"data:{mime_type};base64,{b64}"
+    return f"data:{mime_type};base64,{b64encode_str(image_data)}"
@@ -63,7 +63,7 @@ CAPABILITIES: dict[str, dict[str, str | bool]] = {
 }
 
 
-def _get_capabilities_list() -> list[ModelCapability]:
+def _build_capabilities_list() -> list[ModelCapability]:
     """Build the full capability list for all models."""
     result = []
     for model_id, model_info in MODELS.items():
@@ -83,6 +83,10 @@ def _get_capabilities_list() -> list[ModelCapability]:
     return result
 
 
+# MODELS and CAPABILITIES are static, so the list is built once at import
+_CAPABILITIES_LIST = _build_capabilities_list()
+
+
 def recommend_model(
     style_preset: str | None = None,
     resolution: str | None = None,
@@ -96,7 +100,7 @@ def recommend_model(
     3. Character references → Gemini 3 Pro (up to 5 subjects)
     4. Default → Gemini 2.5 Flash (best cost/quality)
     """
-    capabilities = _get_capabilities_list()
+    capabilities = _CAPABILITIES_LIST
 
     if style_preset == "product_photography":
         return ModelRecommendation(
@@ -176,3 +180,17 @@ def get_fallback_suggestion(unavailable_model_id: str) -> FallbackSuggestion | N
         reason=f"{MODELS[unavailable_model_id]['name']} is temporarily unavailable. "
                f"{suggested_model['name']} offers similar capabilities.",
     )
+
+
+# Suggestions depend only on static tables, so each one is serialized once
+# at import and served as raw JSON bytes
+_FALLBACK_JSON: dict[str, bytes] = {
+    model_id: suggestion.model_dump_json().encode()
+    for model_id in FALLBACK_MAP
+    if (suggestion := get_fallback_suggestion(model_id)) is not None
+}
+
+
+def get_fallback_json(unavailable_model_id: str) -> bytes | None:
+    """Return the pre-serialized fallback suggestion JSON, or None if there is none."""
+    return _FALLBACK_JSON.get(unavailable_model_id)
@@ -1,29 +1,43 @@
 """OpenRouter API client with error handling and retry logic."""
 
 import asyncio
-import base64
-import json
 from typing import Any
 
 import httpx
 
 from backend.config import MODELS, get_api_key
-from backend.services.image_processor import compress_for_size_limit, image_to_base64_url
+from backend.services.image_processor import b64decode, compress_for_size_limit, image_to_base64_url
 from backend.utils.logging import log_error
+from backend.utils.storage import dumps_json_compact, loads_json
 
 OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 TIMEOUT = 120.0
 MAX_RETRIES = 3
 BACKOFF_BASE = 2
+# Allowance for JSON structure and non-content fields in payload size estimates
+PAYLOAD_OVERHEAD_ESTIMATE = 4096
+
+# Pool sizing for the shared client; keepalive outlasts the gap between
+# generations so follow-up requests reuse the same TLS session
+POOL_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=120.0,
+)
 
 # Shared httpx client for connection pooling (initialized via startup/shutdown)
 _client: httpx.AsyncClient | None = None
 
 
+def _new_client() -> httpx.AsyncClient:
+    # HTTP/2 (via httpx[http2]) lets concurrent generations share one connection
+    return httpx.AsyncClient(timeout=TIMEOUT, http2=True, limits=POOL_LIMITS)
+
+
 def startup() -> None:
     """Create the shared httpx client. Call from app lifespan startup."""
     global _client
-    _client = httpx.AsyncClient(timeout=TIMEOUT)
+    _client = _new_client()
 
 
 async def shutdown() -> None:
@@ -38,7 +52,7 @@ def _get_client() -> httpx.AsyncClient:
     """Return the shared client, or create a fallback if not initialized."""
     global _client
     if _client is None:
-        _client = httpx.AsyncClient(timeout=TIMEOUT)
+        _client = _new_client()
     return _client
 
 
@@ -57,13 +71,23 @@ class OpenRouterError(Exception):
         super().__init__(message)
 
 
+# Headers that are the same on every request; only Authorization varies
+_STATIC_HEADERS = {
+    "Content-Type": "application/json",
+    "HTTP-Referer": "http://localhost:8000",
+    "X-Title": "Punchy Image",
+}
+
+
 def _build_headers(api_key: str) -> dict[str, str]:
-    return {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "http://localhost:8000",
-        "X-Title": "Punchy Image",
-    }
+    return {"Authorization": f"Bearer {api_key}", **_STATIC_HEADERS}
+
+
+def _decode_data_url(url: str) -> bytes:
+    """Decode the base64 payload of a data URL without copying it as a str."""
+    raw = url.encode("ascii")
+    comma = raw.index(b",")
+    return b64decode(memoryview(raw)[comma + 1:])
 
 
 def _parse_response(data: dict[str, Any], model_info: dict[str, Any]) -> dict[str, Any]:
@@ -95,8 +119,10 @@ def _parse_response(data: dict[str, Any], model_info: dict[str, Any]) -> dict[st
         raise OpenRouterError("server", "Invalid image data in response")
 
     # Strip data URI prefix and decode base64
-    base64_data = image_url.split(",", 1)[1]
-    image_bytes = base64.b64decode(base64_data)
+    try:
+        image_bytes = _decode_data_url(image_url)
+    except (UnicodeEncodeError, ValueError):
+        raise OpenRouterError("server", "Invalid image data in response")
 
     # Extract text response (conversational models only)
     text_response = None
@@ -164,45 +190,104 @@ def _handle_error_status(response: httpx.Response, attempt: int) -> None:
         raise OpenRouterError("server", f"Unexpected error ({status}): {error_msg}")
 
 
-def _compress_payload_images(payload: dict[str, Any], max_bytes: int) -> None:
+def _data_url_parts(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return the message content parts that carry inline data URL images."""
+    image_parts: list[dict[str, Any]] = []
+    for msg in payload.get("messages", []):
+        content = msg.get("content")
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if not isinstance(part, dict) or part.get("type") != "image_url":
+                continue
+            if part.get("image_url", {}).get("url", "").startswith("data:image/"):
+                image_parts.append(part)
+    return image_parts
+
+
+def _estimate_payload_size(payload: dict[str, Any]) -> int:
+    """Estimate the serialized payload size from its message content lengths.
+
+    Base64 image data dominates, so this is close but not exact; callers must
+    still check the real serialized size.
+    """
+    size = PAYLOAD_OVERHEAD_ESTIMATE
+    for msg in payload.get("messages", []):
+        content = msg.get("content")
+        if isinstance(content, str):
+            size += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if not isinstance(part, dict):
+                    continue
+                if part.get("type") == "text":
+                    size += len(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    size += len(part.get("image_url", {}).get("url", ""))
+    return size
+
+
+def _compress_image_url(url: str, max_base64_bytes: int) -> str:
+    """Recompress a data URL image so its base64 payload fits max_base64_bytes."""
+    # Decode the current base64 image
+    image_bytes = _decode_data_url(url)
+    try:
+        compressed = compress_for_size_limit(image_bytes, max_base64_bytes)
+    except ValueError:
+        raise OpenRouterError(
+            "server",
+            "Reference image too large for this model's 4.5MB request limit. "
+            "Try using a smaller image.",
+        )
+    del image_bytes  # Free original decoded bytes before re-encoding
+    return image_to_base64_url(compressed)
+
+
+async def _compress_payload_images(payload: dict[str, Any], max_bytes: int, payload_size: int) -> None:
     """Compress base64 images in the payload until total size fits within max_bytes.
 
+    payload_size is the payload's current serialized size; it is adjusted as
+    each data URL is replaced rather than re-serializing the payload.
     Modifies the payload in place. Raises OpenRouterError if images can't be
     compressed enough to fit.
     """
     # Reserve headroom for JSON structure, prompt text, etc.
     overhead = max_bytes // 10  # 10% buffer
     target = max_bytes - overhead
-
-    for msg in payload.get("messages", []):
-        content = msg.get("content")
-        if not isinstance(content, list):
-            continue
-        for part in content:
-            if not isinstance(part, dict) or part.get("type") != "image_url":
-                continue
-            url = part.get("image_url", {}).get("url", "")
-            if not url.startswith("data:image/"):
-                continue
-            # Decode the current base64 image
-            b64_data = url.split(",", 1)[1]
-            image_bytes = base64.b64decode(b64_data)
-            # Budget: split target evenly across remaining images (conservative)
-            per_image_budget = target // 2  # generous per-image allowance
-            try:
-                compressed = compress_for_size_limit(image_bytes, per_image_budget)
-            except ValueError:
-                raise OpenRouterError(
-                    "server",
-                    "Reference image too large for this model's 4.5MB request limit. "
-                    "Try using a smaller image.",
-                )
-            del image_bytes  # Free original decoded bytes before re-encoding
-            part["image_url"]["url"] = image_to_base64_url(compressed)
-            del compressed  # Free compressed bytes after encoding to base64
+    # Budget: split target evenly across remaining images (conservative)
+    per_image_budget = target // 2  # generous per-image allowance
+    # Upper bound on a recompressed image's data URL length
+    max_url_len = per_image_budget + len("data:image/jpeg;base64,")
+
+    image_parts = _data_url_parts(payload)
+
+    # Largest images first, stopping as soon as the payload fits, so small
+    # images are never decoded and re-encoded when they don't need to be
+    image_parts.sort(key=lambda p: len(p["image_url"]["url"]), reverse=True)
+    while image_parts and payload_size > max_bytes:
+        # Take just enough of the largest images that compressing them is
+        # guaranteed to fit, then compress that batch concurrently
+        batch: list[dict[str, Any]] = []
+        projected = payload_size
+        for part in image_parts:
+            if projected <= max_bytes:
+                break
+            batch.append(part)
+            projected -= max(0, len(part["image_url"]["url"]) - max_url_len)
+        image_parts = image_parts[len(batch):]
+
+        new_urls = await asyncio.gather(*(
+            asyncio.to_thread(_compress_image_url, part["image_url"]["url"], per_image_budget)
+            for part in batch
+        ))
+        for part, new_url in zip(batch, new_urls):
+            # Data URLs are plain ASCII with nothing JSON needs to escape, so
+            # the serialized size changes by exactly the length difference
+            payload_size += len(new_url) - len(part["image_url"]["url"])
+            part["image_url"]["url"] = new_url
 
     # Final size check
-    final_size = len(json.dumps(payload).encode())
+    final_size = payload_size
     if final_size > max_bytes:
         raise OpenRouterError(
             "server",
@@ -304,13 +389,22 @@ async def generate_image(
     if image_config:
         payload["image_config"] = image_config
 
-    # Enforce per-model request size limits (e.g. Sourceful's 4.5MB cap)
+    # Enforce per-model request size limits (e.g. Sourceful's 4.5MB cap).
+    # Compress before serializing when the estimate is already over, so an
+    # oversized payload isn't dumped only to be thrown away.
     max_request_bytes = model_info.get("max_request_bytes")
     if max_request_bytes:
-        payload_size = len(json.dumps(payload).encode())
-        if payload_size > max_request_bytes:
-            # Find and compress base64 images in the message content to fit
-            _compress_payload_images(payload, max_request_bytes)
+        estimated_size = _estimate_payload_size(payload)
+        if estimated_size > max_request_bytes:
+            await _compress_payload_images(payload, max_request_bytes, estimated_size)
+
+    # Serialize once; the same bytes are measured and sent on every attempt
+    body = dumps_json_compact(payload)
+
+    if max_request_bytes and len(body) > max_request_bytes:
+        # The estimate undershot (e.g. escaped text); compress against the real size
+        await _compress_payload_images(payload, max_request_bytes, len(body))
+        body = dumps_json_compact(payload)
 
     headers = _build_headers(api_key)
 
@@ -323,12 +417,12 @@ async def generate_image(
             response = await client.post(
                 OPENROUTER_URL,
                 headers=headers,
-                json=payload,
+                content=body,
                 timeout=TIMEOUT,
             )
 
             if response.status_code == 200:
-                return _parse_response(response.json(), model_info)
+                return _parse_response(loads_json(response.content), model_info)
 
             _handle_error_status(response, attempt)
 
@@ -9,6 +9,8 @@ Assembly order (per CLAUDE.md):
 6. Image weight adjustment (modifies reference image instruction framing)
 """
 
+import functools
+
 from backend.config import is_conversational
 
 STYLE_PRESETS: dict[str, str] = {
@@ -26,6 +28,10 @@ STYLE_PRESETS: dict[str, str] = {
     "product_photography": "Professional product photography, white background, studio lighting, commercial quality",
 }
 
+# Preset suffixes by position; "none" is first, so index 0 means no suffix
+_STYLE_IDX: dict[str, int] = {name: i for i, name in enumerate(STYLE_PRESETS)}
+_STYLE_SUFFIXES: tuple[str, ...] = tuple(STYLE_PRESETS.values())
+
 STYLE_DISPLAY_NAMES: dict[str, str] = {
     "none": "None",
     "photorealistic": "Photorealistic",
@@ -41,6 +47,18 @@ STYLE_DISPLAY_NAMES: dict[str, str] = {
     "product_photography": "Product Photography",
 }
 
+SUBJECT_CONSISTENCY_INSTRUCTION = (
+    "Use the provided reference image(s) to maintain consistent appearance "
+    "for the subject. Preserve facial features, body proportions, clothing "
+    "details, and distinguishing characteristics"
+)
+
+STYLE_REFERENCE_INSTRUCTION = (
+    "Adopt the visual style, color palette, lighting, and artistic technique "
+    "of the provided style reference image. Do not replicate the subject matter "
+    "of the reference"
+)
+
 # Default image weight mappings — these translate the 0-100 slider into prompt framing.
 # Stored here as defaults; can be overridden via ~/.imagegen/image_weight_mappings.json
 DEFAULT_IMAGE_WEIGHT_MAPPINGS: dict[str, dict[str, str]] = {
@@ -82,14 +100,26 @@ def _get_weight_bracket(weight: int) -> str:
         return "high"
 
 
+# The slider only has 101 positions, so the final instruction strings are
+# tabulated once and indexed by weight
+_INSTRUCTION_BY_WEIGHT: dict[str, tuple[str, ...]] = {
+    model_type: tuple(
+        DEFAULT_IMAGE_WEIGHT_MAPPINGS[_get_weight_bracket(w)][model_type] for w in range(101)
+    )
+    for model_type in ("conversational", "image_only")
+}
+
+
 def build_image_weight_instruction(weight: int, model_id: str | None) -> str:
     """Build an image weight instruction string from the slider value."""
-    bracket = _get_weight_bracket(weight)
     model_type = "conversational" if (model_id and is_conversational(model_id)) else "image_only"
-    mapping = DEFAULT_IMAGE_WEIGHT_MAPPINGS.get(bracket, DEFAULT_IMAGE_WEIGHT_MAPPINGS["medium"])
-    return mapping[model_type]
+    # Out-of-range weights clamp to the end brackets, as the ladder did
+    return _INSTRUCTION_BY_WEIGHT[model_type][min(max(weight, 0), 100)]
 
 
+# All arguments are hashable and the output is pure, so repeated requests
+# (retries, batch variations) reuse the assembled string
+@functools.lru_cache(maxsize=256)
 def build_prompt(
     user_prompt: str,
     style_preset: str | None = None,
@@ -104,50 +134,47 @@ def build_prompt(
     The user's prompt is always included unmodified. Other components
     are assembled around it in the documented order.
     """
-    parts: list[str] = []
+    # Unknown and missing presets resolve to index 0, "none" (empty suffix)
+    suffix = _STYLE_SUFFIXES[_STYLE_IDX.get(style_preset, 0)]
+    has_negative = bool(negative_prompt and negative_prompt.strip())
+
+    # Plain text-only prompts are just the user's prompt
+    if not (has_character_refs or has_style_ref or suffix or has_negative):
+        return user_prompt.strip()
+
+    # One fixed slot per component, in assembly order; unused slots stay None
+    slots: list[str | None] = [None] * 6
 
     # 1. Subject-consistency instructions (if character reference images present)
     if has_character_refs:
-        parts.append(
-            "Use the provided reference image(s) to maintain consistent appearance "
-            "for the subject. Preserve facial features, body proportions, clothing "
-            "details, and distinguishing characteristics"
-        )
+        slots[0] = SUBJECT_CONSISTENCY_INSTRUCTION
 
     # 2. Style reference instructions (if style reference image uploaded)
     if has_style_ref:
-        parts.append(
-            "Adopt the visual style, color palette, lighting, and artistic technique "
-            "of the provided style reference image. Do not replicate the subject matter "
-            "of the reference"
-        )
+        slots[1] = STYLE_REFERENCE_INSTRUCTION
 
     # 3. User's prompt (unmodified)
-    parts.append(user_prompt.strip())
+    slots[2] = user_prompt.strip()
 
     # 4. Style preset suffix
-    if style_preset and style_preset != "none":
-        suffix = STYLE_PRESETS.get(style_preset, "")
-        if suffix:
-            parts.append(suffix)
+    slots[3] = suffix or None
 
     # 5. Negative prompt / exclusion instructions
-    if negative_prompt and negative_prompt.strip():
+    if has_negative:
         neg = negative_prompt.strip()
         if model_id and is_conversational(model_id):
-            parts.append(
+            slots[4] = (
                 f"IMPORTANT: Do NOT include any of the following in the generated image. "
                 f"These elements must be completely absent: {neg}"
             )
         else:
-            parts.append(
+            slots[4] = (
                 f"IMPORTANT: The following must NOT appear anywhere in the image. "
                 f"Exclude completely: {neg}"
             )
 
     # 6. Image weight adjustment (modifies reference image instruction framing)
     if image_weight is not None and (has_character_refs or has_style_ref):
-        weight_instruction = build_image_weight_instruction(image_weight, model_id)
-        parts.append(weight_instruction)
+        slots[5] = build_image_weight_instruction(image_weight, model_id)
 
-    return ". ".join(parts)
+    return ". ".join([part for part in slots if part is not None])
@@ -1,51 +1,101 @@
-"""LRU-bounded in-memory cache for reference image data URLs.
+"""Size-bounded in-memory cache for reference image data URLs.
 
 Disk copies in the project's references/ directory are the source of truth.
 The cache avoids re-reading and re-encoding on every generation request.
 """
 
+import asyncio
 import collections
-from pathlib import Path
 
 from backend.services.image_processor import image_to_base64_url
 from backend.utils.storage import get_references_dir
 
 MAX_CACHE_SIZE = 20
+# How many unknown reference IDs to remember as missing on disk
+MAX_MISSING_IDS = 1024
+
+
+def _read_reference_file(reference_id: str) -> str | None:
+    """Load a reference from disk as a data URL, or None if it doesn't exist."""
+    ref_path = get_references_dir() / f"{reference_id}.jpg"
+    if not ref_path.exists():
+        return None
+    return image_to_base64_url(ref_path.read_bytes())
 
 
 class _ReferenceCache:
-    """LRU cache for reference image base64 data URLs."""
+    """CLOCK (second-chance) cache for reference image base64 data URLs.
+
+    Hits only set a reference bit. On overflow, entries are examined oldest
+    first: a referenced entry has its bit cleared and moves to the back, the
+    first unreferenced one is evicted. New entries start referenced, so a
+    fresh upload outlives at least one full sweep.
+    """
 
     def __init__(self, max_size: int = MAX_CACHE_SIZE):
-        self._cache: collections.OrderedDict[str, str] = collections.OrderedDict()
+        self._cache: dict[str, str] = {}
+        self._referenced: set[str] = set()
         self._max_size = max_size
+        # IDs with no file on disk, so repeat lookups skip the stat; the
+        # deque keeps insertion order for dropping the oldest
+        self._missing: set[str] = set()
+        self._missing_order: collections.deque[str] = collections.deque()
 
     def store(self, reference_id: str, data_url: str) -> None:
-        if reference_id in self._cache:
-            self._cache.move_to_end(reference_id)
-            self._cache[reference_id] = data_url
-        else:
-            self._cache[reference_id] = data_url
-            if len(self._cache) > self._max_size:
-                self._cache.popitem(last=False)
+        self._missing.discard(reference_id)
+        if reference_id not in self._cache and len(self._cache) >= self._max_size:
+            self._evict()
+        self._cache[reference_id] = data_url
+        self._referenced.add(reference_id)
+
+    def _evict(self) -> None:
+        while True:
+            victim = next(iter(self._cache))
+            if victim not in self._referenced:
+                del self._cache[victim]
+                return
+            # Second chance: clear the bit and move to the back
+            self._referenced.discard(victim)
+            self._cache[victim] = self._cache.pop(victim)
 
     def get(self, reference_id: str) -> str | None:
         """Get a reference data URL. Falls back to disk if evicted from cache."""
-        if reference_id in self._cache:
-            self._cache.move_to_end(reference_id)
-            return self._cache[reference_id]
+        data_url = self.get_cached(reference_id)
+        if data_url is not None or self.is_missing(reference_id):
+            return data_url
 
         # Cache miss — try loading from disk
-        ref_path = get_references_dir() / f"{reference_id}.jpg"
-        if ref_path.exists():
-            data_url = image_to_base64_url(ref_path.read_bytes())
+        data_url = _read_reference_file(reference_id)
+        self.record_load(reference_id, data_url)
+        return data_url
+
+    def get_cached(self, reference_id: str) -> str | None:
+        """Get a reference data URL from memory only, without touching disk."""
+        data_url = self._cache.get(reference_id)
+        if data_url is not None:
+            self._referenced.add(reference_id)
+        return data_url
+
+    def is_missing(self, reference_id: str) -> bool:
+        """Return True if a previous disk lookup found no file for this ID."""
+        return reference_id in self._missing
+
+    def record_load(self, reference_id: str, data_url: str | None) -> None:
+        """Cache the result of a disk lookup, remembering misses."""
+        if data_url is not None:
             self.store(reference_id, data_url)
-            return data_url
+        else:
+            self._remember_missing(reference_id)
 
-        return None
+    def _remember_missing(self, reference_id: str) -> None:
+        self._missing.add(reference_id)
+        self._missing_order.append(reference_id)
+        if len(self._missing_order) > MAX_MISSING_IDS:
+            self._missing.discard(self._missing_order.popleft())
 
     def delete(self, reference_id: str) -> None:
         self._cache.pop(reference_id, None)
+        self._referenced.discard(reference_id)
 
     def __len__(self) -> int:
         return len(self._cache)
@@ -69,28 +119,31 @@ def delete_reference(reference_id: str) -> None:
     _store.delete(reference_id)
 
 
-def resolve_reference_urls(
+async def resolve_reference_urls_async(
     reference_image_id: str | None = None,
     style_reference_id: str | None = None,
     character_reference_ids: list[str] | None = None,
 ) -> tuple[str | None, list[str]]:
-    """Resolve reference IDs to data URLs.
+    """Resolve reference IDs to data URLs, loading cache misses from disk concurrently.
 
     Returns (primary_url, additional_urls).
     """
-    primary_url = None
-    if reference_image_id:
-        primary_url = get_reference(reference_image_id)
-
-    additional_urls: list[str] = []
-    if style_reference_id:
-        url = get_reference(style_reference_id)
-        if url:
-            additional_urls.append(url)
-    if character_reference_ids:
-        for char_id in character_reference_ids:
-            url = get_reference(char_id)
-            if url:
-                additional_urls.append(url)
+    ids = [reference_image_id, style_reference_id, *(character_reference_ids or ())]
+    urls = {rid: _store.get_cached(rid) for rid in ids if rid}
+
+    # Disk reads and base64 encoding run in worker threads; the cache itself
+    # is only updated here, on the event loop
+    misses = [rid for rid, url in urls.items() if url is None and not _store.is_missing(rid)]
+    if misses:
+        loaded = await asyncio.gather(*(asyncio.to_thread(_read_reference_file, rid) for rid in misses))
+        for rid, data_url in zip(misses, loaded):
+            _store.record_load(rid, data_url)
+            urls[rid] = data_url
+
+    primary_url = urls.get(reference_image_id) if reference_image_id else None
+
+    additional_ids = [style_reference_id] if style_reference_id else []
+    additional_ids.extend(character_reference_ids or ())
+    additional_urls = [url for rid in additional_ids if (url := urls.get(rid))]
 
     return primary_url, additional_urls
@@ -1,29 +1,69 @@
 """Online/offline detection via OpenRouter API endpoint."""
 
 import asyncio
+import time
 from datetime import datetime, timezone
 
 import httpx
 
 _online: bool = True
 _last_checked: str = ""
+_last_checked_monotonic: float | None = None
 _check_lock = asyncio.Lock()
 
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/models"
 CHECK_TIMEOUT = 5.0
+# Checks within this many seconds of the last probe reuse its result
+CHECK_TTL_SECONDS = 10.0
+
+# Reused across checks so repeat probes ride the same keep-alive connection
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared probe client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=CHECK_TIMEOUT,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=2),
+        )
+    return _client
+
+
+async def close_connectivity_client() -> None:
+    """Close the shared probe client. Call from app lifespan shutdown."""
+    global _client
+    if _client:
+        await _client.aclose()
+        _client = None
+
+
+def _is_fresh() -> bool:
+    return (
+        _last_checked_monotonic is not None
+        and time.monotonic() - _last_checked_monotonic < CHECK_TTL_SECONDS
+    )
 
 
 async def check_connectivity() -> bool:
     """Check if OpenRouter API is reachable. Updates cached state."""
-    global _online, _last_checked
+    global _online, _last_checked, _last_checked_monotonic
+    if _is_fresh():
+        return _online
     async with _check_lock:
+        # Callers queued behind an in-flight probe share its result
+        if _is_fresh():
+            return _online
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(OPENROUTER_API_URL, timeout=CHECK_TIMEOUT)
-                _online = resp.status_code < 500
+            # HEAD skips downloading the models list; any non-5xx means reachable
+            resp = await _get_client().head(OPENROUTER_API_URL)
+            _online = resp.status_code < 500
         except (httpx.ConnectError, httpx.TimeoutException, OSError):
             _online = False
         _last_checked = datetime.now(timezone.utc).isoformat()
+        _last_checked_monotonic = time.monotonic()
         return _online
 
 
@@ -5,6 +5,8 @@ import traceback
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
+from backend.config import get_api_key
+
 IMAGEGEN_DIR = Path.home() / ".imagegen"
 
 _logger: logging.Logger | None = None
@@ -36,16 +38,16 @@ def setup_logger() -> logging.Logger:
 
 def redact_api_key(message: str, api_key: str | None) -> str:
     """Replace any occurrence of the API key with [REDACTED]."""
-    if not api_key:
+    # Most messages never contain the key; skip building a copy for those
+    if not api_key or api_key not in message:
         return message
     return message.replace(api_key, "[REDACTED]")
 
 
 def log_error(message: str, exc: Exception | None = None) -> None:
     """Log an error with API key redacted."""
-    from backend.config import get_api_key
-
-    logger = setup_logger()
+    # Check the bound logger inline rather than calling setup_logger() per log
+    logger = _logger if _logger is not None else setup_logger()
     api_key = get_api_key()
     safe_message = redact_api_key(message, api_key)
 
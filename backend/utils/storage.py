@@ -1,37 +1,171 @@
 """Filesystem operations with atomic writes and directory helpers."""
 
 import json
+import mmap
 import os
+import shutil
+import uuid
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+import msgpack
+import orjson
+
 
 IMAGEGEN_DIR = Path.home() / ".imagegen"
 
+# Largest payload write_json_in_place writes without a temp file
+SMALL_WRITE_MAX = 64 * 1024
+# JSON files larger than this are parsed from an mmap rather than read into memory
+MMAP_READ_MIN = 1024 * 1024
 
-def atomic_write(path: Path, data: str) -> None:
-    """Write data to a file atomically using write-to-temp-then-rename."""
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data to a raw file descriptor, retrying short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write bytes to a file atomically using write-to-temp-then-rename."""
     tmp_path = path.with_suffix(path.suffix + ".tmp")
     try:
-        tmp_path.write_text(data, encoding="utf-8")
-        os.replace(str(tmp_path), str(path))
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _write_all(fd, data)
+            # Flush contents before the rename so a crash can't leave an
+            # empty or partial file under the final name
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
     except Exception:
         tmp_path.unlink(missing_ok=True)
         raise
 
 
+def atomic_write(path: Path, data: str) -> None:
+    """Write text to a file atomically using write-to-temp-then-rename."""
+    atomic_write_bytes(path, data.encode("utf-8"))
+
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize data to indented UTF-8 JSON bytes."""
+    return orjson.dumps(
+        data,
+        default=str,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def dumps_json_compact(data: Any) -> bytes:
+    """Serialize data to compact UTF-8 JSON bytes, e.g. for request bodies."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads_json(raw: bytes | memoryview) -> Any:
+    """Parse JSON from UTF-8 bytes."""
+    return orjson.loads(raw)
+
+
 def atomic_write_json(path: Path, data: Any) -> None:
     """Serialize data as JSON and write atomically."""
-    atomic_write(path, json.dumps(data, indent=2, default=str))
+    atomic_write_bytes(path, dumps_json(data))
 
 
-def read_json(path: Path) -> Any:
-    """Read and parse a JSON file. Returns [] for missing/empty list files, {} otherwise."""
-    if not path.exists():
-        return [] if "history" in path.name else {}
+def write_json_in_place(path: Path, data: Any) -> None:
+    """Overwrite a small, rebuildable JSON file in place.
+
+    Skips the temp-file-and-rename of atomic_write_json: one open with
+    O_TRUNC and one write. Not crash-atomic, so only use it for derived
+    files whose readers rebuild them when unparseable. Payloads of
+    SMALL_WRITE_MAX bytes or more go through atomic_write_bytes instead.
+    """
+    raw = dumps_json(data)
+    if len(raw) >= SMALL_WRITE_MAX:
+        atomic_write_bytes(path, raw)
+        return
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, raw)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_msgpack(path: Path, data: Any) -> None:
+    """Serialize data as msgpack and write atomically."""
+    atomic_write_bytes(path, msgpack.packb(data, use_bin_type=True, default=str))
+
+
+def read_msgpack(path: Path) -> Any:
+    """Read and parse a msgpack file. Returns None if missing or unreadable."""
+    try:
+        return msgpack.unpackb(path.read_bytes(), raw=False)
+    except (OSError, ValueError, msgpack.UnpackException):
+        return None
+
+
+def _json_line(data: Any) -> bytes:
+    """Serialize data as one compact, newline-terminated JSON line."""
+    return orjson.dumps(
+        data,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+    )
+
+
+def append_json_line(path: Path, data: Any) -> None:
+    """Append data to a JSONL file as one compact line."""
+    with open(path, "ab") as f:
+        f.write(_json_line(data))
+
+
+def append_json_lines(path: Path, records: list[Any]) -> None:
+    """Append several records to a JSONL file with a single write."""
+    with open(path, "ab") as f:
+        f.write(b"".join(_json_line(r) for r in records))
+
+
+def read_json_lines(path: Path) -> list[Any]:
+    """Read a JSONL file. Missing files yield [] and unparseable lines are skipped."""
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(loads_json(line))
+        except json.JSONDecodeError:
+            # A torn final line from an interrupted append
+            continue
+    return records
+
+
+def _read_json_bytes(path: Path) -> Any:
+    """Parse a JSON file, mapping large files instead of copying them."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size > MMAP_READ_MIN:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return loads_json(view)
+        return loads_json(f.read())
+
+
+def read_json(path: Path, default: Callable[[], Any] | None = None) -> Any:
+    """Read and parse a JSON file, returning default() if missing or unreadable.
+
+    Without a default, list files (named *history*) fall back to [] and
+    everything else to {}.
+    """
     try:
-        text = path.read_text(encoding="utf-8")
-        return json.loads(text)
-    except (json.JSONDecodeError, OSError):
+        return _read_json_bytes(path)
+    except (json.JSONDecodeError, OSError, ValueError):
+        if default is not None:
+            return default()
         return [] if "history" in path.name else {}
 
 
@@ -65,11 +199,40 @@ def get_templates_dir() -> Path:
     return IMAGEGEN_DIR / "templates"
 
 
+def get_trash_dir() -> Path:
+    """Get the staging directory for trees awaiting background deletion."""
+    return IMAGEGEN_DIR / ".trash"
+
+
+def move_to_trash(path: Path) -> Path:
+    """Atomically move a directory into the trash and return its new location.
+
+    The rename is O(1) regardless of tree size; the caller is responsible for
+    deleting the returned path (typically off the request path).
+    """
+    trash_path = get_trash_dir() / uuid.uuid4().hex
+    trash_path.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(path, trash_path)
+    return trash_path
+
+
+def purge_trash() -> None:
+    """Delete anything left in the trash, e.g. by a shutdown mid-delete."""
+    trash_dir = get_trash_dir()
+    if trash_dir.exists():
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+
 def get_spend_log_path() -> Path:
     """Get the path to the spend log CSV."""
     return IMAGEGEN_DIR / "spend_log.csv"
 
 
+def get_spend_totals_path() -> Path:
+    """Get the path to the running spend totals sidecar."""
+    return IMAGEGEN_DIR / "spend_totals.json"
+
+
 def list_projects() -> list[str]:
     """List all project directory names."""
     projects_dir = IMAGEGEN_DIR / "projects"
@@ -81,11 +244,20 @@ def list_projects() -> list[str]:
 
 
 def get_dir_size(path: Path) -> int:
-    """Recursively compute total bytes used by a directory."""
+    """Recursively compute total bytes used by a directory.
+
+    DirEntry answers is_dir/is_file from the directory listing, so only the
+    size lookup costs a stat per file. Symlinks are not followed.
+    """
     if not path.exists():
         return 0
     total = 0
-    for f in path.rglob("*"):
-        if f.is_file():
-            total += f.stat().st_size
+    stack = [os.fspath(path)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
     return total
@@ -2,7 +2,6 @@
 """ImageGen launcher. Starts the backend and serves the frontend."""
 
 import argparse
-import json
 import os
 import subprocess
 import sys
@@ -11,6 +10,21 @@ from pathlib import Path
 IMAGEGEN_DIR = Path.home() / ".imagegen"
 
 
+def _init_if_absent(path: Path, default: bytes, mode: int = 0o644) -> None:
+    """Create a file with default contents unless it already exists.
+
+    O_EXCL makes the existence check and the create a single atomic open.
+    """
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    except FileExistsError:
+        return
+    try:
+        os.write(fd, default)
+    finally:
+        os.close(fd)
+
+
 def ensure_directories() -> None:
     """Create the ~/.imagegen/ directory structure on first launch."""
     dirs = [
@@ -26,17 +40,12 @@ def ensure_directories() -> None:
         d.mkdir(parents=True, exist_ok=True)
 
     # Initialize empty JSON files if they don't exist
-    config_path = IMAGEGEN_DIR / "config.json"
-    if not config_path.exists():
-        config_path.write_text(json.dumps({}, indent=2))
-
-    history_path = IMAGEGEN_DIR / "projects" / "default" / "history.json"
-    if not history_path.exists():
-        history_path.write_text(json.dumps([], indent=2))
-
-    project_path = IMAGEGEN_DIR / "projects" / "default" / "project.json"
-    if not project_path.exists():
-        project_path.write_text(json.dumps({"name": "default"}, indent=2))
+    _init_if_absent(IMAGEGEN_DIR / "config.json", b"{}", mode=0o600)
+    _init_if_absent(IMAGEGEN_DIR / "projects" / "default" / "history.json", b"[]")
+    _init_if_absent(
+        IMAGEGEN_DIR / "projects" / "default" / "project.json",
+        b'{\n  "name": "default"\n}',
+    )
 
 
 def build_frontend() -> None: